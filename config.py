@@ -1,8 +1,25 @@
+import functools
 import os
 from dataclasses import dataclass
-from dotenv import load_dotenv
 
-load_dotenv()
+# .env の読み込みは認証情報が必要になった時点まで遅延させる
+_dotenv_loaded = False
+
+
+def ensure_dotenv() -> None:
+    """
+    .env ファイルを初回呼び出し時に一度だけ読み込む。
+
+    定数のみを参照するスクリプトでは .env の解析や
+    dotenv パッケージの import 自体が不要なため、
+    load_twitter_auth や DEBUG 判定（tools.core）から必要時にのみ呼び出す。
+    """
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _dotenv_loaded = True
 
 
 @dataclass(frozen=True)
@@ -15,6 +32,7 @@ class TwitterAuth:
 
 
 
+@functools.lru_cache(maxsize=8)
 def load_twitter_auth(suffix: str | None = None) -> TwitterAuth:
     """
     環境変数から Twitter API 認証情報を読み込み、
@@ -43,10 +61,16 @@ def load_twitter_auth(suffix: str | None = None) -> TwitterAuth:
          - ACCESS_SECRET_COVER
          - BEARER_TOKEN_COVER
 
-    `os.getenv()` の戻り値は仕様上 `str | None` であるため、
-    本関数では内部ヘルパー関数を用いて
+    `os.environ.get()` の戻り値は仕様上 `str | None` であるため、
+    本関数では 5 つの環境変数名をまとめて走査し、
     「必ず str を返す」ことを型・実行時の両面で保証する。
 
+    結果は suffix ごとに `functools.lru_cache` でキャッシュされ、
+    同一 suffix に対する 2 回目以降の呼び出しでは
+    環境変数の再読み込みを行わず同じ TwitterAuth を返す。
+    環境変数を差し替えた場合（テスト等）は
+    `load_twitter_auth.cache_clear()` でキャッシュを破棄すること。
+
     Args:
         suffix (str | None):
             環境変数名の末尾に付与する識別子。
@@ -62,52 +86,35 @@ def load_twitter_auth(suffix: str | None = None) -> TwitterAuth:
             以下のいずれかに該当する場合に送出される。
             - suffix が空文字列で指定された場合
             - 必要な環境変数が未定義、または空文字である場合
+              （未設定の環境変数名はすべてメッセージに列挙される）
 
             設定ミスや設定漏れをアプリケーション起動時に
             即座に検出することを目的とする。
     """
 
+    ensure_dotenv()
+
     if suffix == "":
         raise ValueError("suffix に空文字列は指定できません。")
 
     suffix_part = f"_{suffix}" if suffix is not None else ""
 
-    def require_env(name: str) -> str:
-        """
-        必須環境変数を取得し、値が存在しない場合は例外を送出する。
-
-        Args:
-            name (str):
-                取得対象の環境変数名。
-
-        Returns:
-            str:
-                環境変数の値。
-                正常終了時、この戻り値は必ず str 型である。
-
-        Raises:
-            ValueError:
-                環境変数が未定義、または空文字の場合。
-        """
-        value = os.getenv(name)
-        if value is None or value == "":
-            raise ValueError(f"環境変数 {name} が設定されていません。")
-        return value
-
-    api_key = require_env(f"API_KEY{suffix_part}")
-    api_secret = require_env(f"API_SECRET{suffix_part}")
-    access_token = require_env(f"ACCESS_TOKEN{suffix_part}")
-    access_secret = require_env(f"ACCESS_SECRET{suffix_part}")
-    bearer_token = require_env(f"BEARER_TOKEN{suffix_part}")
-
-    return TwitterAuth(
-        api_key=api_key,
-        api_secret=api_secret,
-        access_token=access_token,
-        access_secret=access_secret,
-        bearer_token=bearer_token,
+    env_get = os.environ.get
+    names = (
+        f"API_KEY{suffix_part}",
+        f"API_SECRET{suffix_part}",
+        f"ACCESS_TOKEN{suffix_part}",
+        f"ACCESS_SECRET{suffix_part}",
+        f"BEARER_TOKEN{suffix_part}",
     )
 
+    values = [env_get(name, "") for name in names]
+    missing = [name for name, value in zip(names, values) if not value]
+    if missing:
+        raise ValueError(f"環境変数 {', '.join(missing)} が設定されていません。")
+
+    return TwitterAuth(*values)
+
 
 
 # アカウントごとに異なる定数
@@ -117,6 +124,14 @@ KEYWORDS_COVER = ["cover", "covered", "歌ってみた", "カバー"]         #
 KEYWORDS_ORIGINAL = ["オリジナル曲", "original"] # ORIGINALアカウント用検索キーワード
 KEYWORDS_STREAM = ["カラオケ", "歌枠"]           # STREAMアカウント用検索キーワード
 
+# suffix（アカウント識別子）→ 検索キーワードの対応表
+KEYWORDS_BY_SUFFIX = {
+    None: KEYWORDS,
+    "COVER": KEYWORDS_COVER,
+    "ORIGINAL": KEYWORDS_ORIGINAL,
+    "STREAM": KEYWORDS_STREAM,
+}
+
 EXCLUDE_KEYWORDS = ["万再生", "万回再生", "short", "shorts"]   # 除外キーワード
 
 # 全体共通定数
@@ -124,6 +139,10 @@ MAX_USERS_PER_SEARCH = 10                        # 一度に検索するユー
 LOOKBACK_DAYS = 1                               # 遡る日数
 RETWEET_LIMIT = 10                               # 1日あたりのリツイート上限
 MAX_TWEETS_PER_SEARCH = 10                      # 一度の検索で取得する最大ツイート数
+MAX_SEARCH_WORKERS = 4                          # 検索を並列実行するスレッド数
+MAX_RETWEET_WORKERS = 4                         # リツイートを並列実行するスレッド数
+RETWEETED_COMPACT_THRESHOLD = 100               # retweeted.ndjson を retweeted.json へ統合する件数
+QUERY_CACHE_MAX_FILES = 8                       # data/cache に保持する検索クエリキャッシュの最大件数
 
 # フォルダ設定
 DATA_DIR = "data"
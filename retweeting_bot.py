@@ -10,19 +10,31 @@ retweeting_bot.py
 
 from __future__ import annotations
 
+import hashlib
+import json
 import sys
 import traceback
-from typing import List, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import closing
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Sequence, Set
+
+import tweepy
 
 from config import (
-    KEYWORDS,
+    EXCLUDE_KEYWORDS,
+    KEYWORDS_BY_SUFFIX,
     MAX_TWEETS_PER_SEARCH,
     RETWEET_LIMIT,
     MAX_USERS_PER_SEARCH,
+    MAX_SEARCH_WORKERS,
+    MAX_RETWEET_WORKERS,
 )
 
 from tools.core import (
     log_message,
+    log_debug,
+    flush_logs,
     get_previous_day_range_utc,
     RETWEET_LOG_FILE,
 )
@@ -30,34 +42,64 @@ from tools.core import (
 from tools.data_manager import (
     load_following_list,
     load_retweeted_list,
-    save_retweeted_list,
+    append_retweeted_id,
+    compact_retweeted_list,
+    load_query_cache,
+    save_query_cache,
 )
 
 from tools.twitter_api import (
+    QUERY_FORMAT_VERSION,
     create_client,
     build_search_query,
     search_tweets,
-    retweet,
+    retweet_many,
 )
 
 
 # ------------------------------------------------------------
 # 検索クエリ生成
 # ------------------------------------------------------------
-def create_search_queries(keywords: Sequence[str]) -> List[str]:
+def make_query_cache_key(usernames: Sequence[str], keywords: Sequence[str]) -> str:
+    """
+    検索クエリ生成の入力一式から、キャッシュキー（SHA-1）を算出する。
+
+    username の並び順はチャンク分割結果に影響するため、ソートせずそのまま用いる。
+    クエリの出力形式は twitter_api.QUERY_FORMAT_VERSION としてキーに含める。
+    """
+    payload = json.dumps(
+        [
+            QUERY_FORMAT_VERSION,
+            list(usernames),
+            list(keywords),
+            EXCLUDE_KEYWORDS,
+            MAX_USERS_PER_SEARCH,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def create_search_queries(keywords: Sequence[str]) -> Iterator[str]:
     """
     following.json と指定された keywords を用いて、
     MAX_USERS_PER_SEARCH ごとに検索クエリを分割生成する。
 
+    following.json・keywords・除外キーワード等が前回と同一であれば、
+    data/cache に保存したクエリをそのまま再利用し、組み立てを省略する。
+    data/cache は git 管理外のため、キャッシュが効くのはローカル実行時や
+    同一プロセス内で再度呼び出した場合のみで、GitHub Actions では毎回組み立てる。
+
     Args:
         keywords (Sequence[str]):
             検索に使用するキーワードのリスト。
             アカウント種別（COVER / ORIGINAL / STREAM 等）ごとに
             呼び出し側で切り替えることを想定する。
 
-    Returns:
-        List[str]:
-            Twitter API v2 search_recent_tweets 用の検索クエリ文字列のリスト。
+    Yields:
+        str:
+            Twitter API v2 search_recent_tweets 用の検索クエリ文字列。
+            ユーザーのチャンクごとに 1 件ずつ生成する。
 
     Raises:
         ValueError:
@@ -71,23 +113,38 @@ def create_search_queries(keywords: Sequence[str]) -> List[str]:
     if not usernames:
         raise ValueError("following.json に username が存在しません。")
 
-    log_message(
+    log_debug(
         RETWEET_LOG_FILE,
-        f"[DEBUG] following.json 読み込み: {len(usernames)}ユーザー",
+        "[DEBUG] following.json 読み込み: %dユーザー",
+        len(usernames),
     )
-    log_message(
+    log_debug(
         RETWEET_LOG_FILE,
-        f"[DEBUG] 使用キーワード: {list(keywords)}",
+        "[DEBUG] 使用キーワード: %s",
+        keywords,
     )
 
+    cache_key = make_query_cache_key(usernames, keywords)
+    cached_queries = load_query_cache(cache_key)
+    if cached_queries is not None:
+        log_debug(
+            RETWEET_LOG_FILE,
+            "[DEBUG] 検索クエリキャッシュ使用: %d件 (%s)",
+            len(cached_queries),
+            cache_key,
+        )
+        yield from cached_queries
+        return
+
     queries: List[str] = []
 
     for i in range(0, len(usernames), MAX_USERS_PER_SEARCH):
         chunk = usernames[i : i + MAX_USERS_PER_SEARCH]
-        log_message(
+        log_debug(
             RETWEET_LOG_FILE,
-            f"[DEBUG] クエリ対象ユーザー: {chunk}",
-            print_to_console=False
+            "[DEBUG] クエリ対象ユーザー: %s",
+            chunk,
+            print_to_console=False,
         )
 
         query = build_search_query(
@@ -97,14 +154,100 @@ def create_search_queries(keywords: Sequence[str]) -> List[str]:
             exclude_replies=True,
         )
 
-        log_message(
+        log_debug(
             RETWEET_LOG_FILE,
-            f"[DEBUG] 生成クエリ: {query}",
-            print_to_console=False
+            "[DEBUG] 生成クエリ: %s",
+            query,
+            print_to_console=False,
         )
         queries.append(query)
+        yield query
+
+    save_query_cache(cache_key, queries)
+
+
+# ------------------------------------------------------------
+# 検索の並列実行
+# ------------------------------------------------------------
+def iter_search_results(
+    client: tweepy.Client,
+    queries: Iterable[str],
+    start_time: datetime,
+    end_time: datetime,
+) -> Iterator[tweepy.Response]:
+    """
+    各クエリの search_tweets をスレッドプールで並列実行し、
+    完了した順にレスポンスを返す。
+
+    検索は HTTP 往復待ちが支配的な I/O バウンド処理のため、
+    最大 MAX_SEARCH_WORKERS 件を同時に実行して待ち時間を重ねる。
+    レスポンスの処理（リツイート・ログ出力）は呼び出し元のスレッドで行う。
+
+    実行中の検索は常に MAX_SEARCH_WORKERS 件以下に抑え、次のクエリは
+    レスポンスを 1 件返して呼び出し元が処理を終えた後に投入する。
+    そのため、ジェネレータが途中で閉じられた場合（上限到達・例外発生時）は、
+    その時点で実行中の検索（最大 MAX_SEARCH_WORKERS 件）の完了を待つだけで、
+    以降のクエリは検索しない。
+
+    Args:
+        client (tweepy.Client):
+            認証済みクライアント。スレッド間で共有する。
+        queries (Iterable[str]):
+            検索クエリ文字列。
+        start_time (datetime):
+            検索開始時刻（UTC）。
+        end_time (datetime):
+            検索終了時刻（UTC）。
+
+    Yields:
+        tweepy.Response:
+            search_recent_tweets の生レスポンス。
+
+    Raises:
+        tweepy.TweepyException:
+            いずれかの検索に失敗した場合。
+    """
+    query_iter = iter(queries)
+
+    def submit_next(executor: ThreadPoolExecutor) -> Optional[Future]:
+        query = next(query_iter, None)
+        if query is None:
+            return None
+        log_debug(
+            RETWEET_LOG_FILE,
+            "[DEBUG] 検索クエリ実行: %s",
+            query,
+        )
+        return executor.submit(
+            search_tweets,
+            client=client,
+            query=query,
+            start_time=start_time,
+            end_time=end_time,
+            max_results=MAX_TWEETS_PER_SEARCH,
+            return_raw=True,
+        )
 
-    return queries
+    executor = ThreadPoolExecutor(max_workers=MAX_SEARCH_WORKERS)
+    try:
+        in_flight: Set[Future] = set()
+        for _ in range(MAX_SEARCH_WORKERS):
+            future = submit_next(executor)
+            if future is None:
+                break
+            in_flight.add(future)
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+                # 呼び出し元がレスポンスを処理し終えてから次の検索を投入する
+                next_future = submit_next(executor)
+                if next_future is not None:
+                    in_flight.add(next_future)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
 
 
 # ------------------------------------------------------------
@@ -142,22 +285,18 @@ def run_retweet_task(suffix: str | None = None) -> None:
         # ----------------------------------------------------
         # 使用キーワードの決定
         # ----------------------------------------------------
-        if suffix is None:
-            keywords = KEYWORDS
-            keywords_name = "KEYWORDS"
-        else:
-            keywords_attr = f"KEYWORDS_{suffix}"
-            try:
-                keywords = getattr(sys.modules["config"], keywords_attr)
-                keywords_name = keywords_attr
-            except AttributeError:
-                raise ValueError(
-                    f"config.py に {keywords_attr} が定義されていません。"
-                )
+        keywords_name = "KEYWORDS" if suffix is None else f"KEYWORDS_{suffix}"
+        keywords = KEYWORDS_BY_SUFFIX.get(suffix)
+        if keywords is None:
+            raise ValueError(
+                f"config.py の KEYWORDS_BY_SUFFIX に {keywords_name} が登録されていません。"
+            )
 
-        log_message(
+        log_debug(
             RETWEET_LOG_FILE,
-            f"[DEBUG] 使用キーワード定義: {keywords_name} = {list(keywords)}",
+            "[DEBUG] 使用キーワード定義: %s = %s",
+            keywords_name,
+            keywords,
         )
 
         # ----------------------------------------------------
@@ -171,96 +310,109 @@ def run_retweet_task(suffix: str | None = None) -> None:
         retweeted_ids = load_retweeted_list()
         total_retweets = 0
 
+        # 今回の実行で処理済みの ID（失敗分を含む）。
+        # 複数クエリに同じツイートが現れても API を再度呼ばない。
+        seen_this_run: Set[int] = set()
+
         # ----------------------------------------------------
         # 日付範囲（UTC）
         # ----------------------------------------------------
         start_time, end_time = get_previous_day_range_utc()
-        log_message(RETWEET_LOG_FILE, f"[DEBUG] start_time={start_time}")
-        log_message(RETWEET_LOG_FILE, f"[DEBUG] end_time={end_time}")
+        log_debug(RETWEET_LOG_FILE, "[DEBUG] start_time=%s", start_time)
+        log_debug(RETWEET_LOG_FILE, "[DEBUG] end_time=%s", end_time)
 
         # ----------------------------------------------------
         # 検索クエリ生成
         # ----------------------------------------------------
         queries = create_search_queries(keywords)
-        if not queries:
-            log_message(
-                RETWEET_LOG_FILE,
-                "[ERROR] 検索クエリ生成に失敗",
-            )
-            return
 
         # ----------------------------------------------------
-        # 各クエリ実行
+        # 各クエリ実行（検索は並列、リツイートは逐次）
         # ----------------------------------------------------
-        for query in queries:
-            log_message(
-                RETWEET_LOG_FILE,
-                f"[DEBUG] 検索クエリ実行: {query}",
-            )
-
-            raw_resp = search_tweets(
-                client=client,
-                query=query,
-                start_time=start_time,
-                end_time=end_time,
-                max_results=MAX_TWEETS_PER_SEARCH,
-                return_raw=True,
-            )
-
-            meta = getattr(raw_resp, "meta", None)
-            log_message(
-                RETWEET_LOG_FILE,
-                f"[DEBUG] Raw API meta: {meta}",
-            )
-
-            tweets = getattr(raw_resp, "data", None) or []
-            log_message(
-                RETWEET_LOG_FILE,
-                f"[DEBUG] 取得ツイート件数: {len(tweets)}",
-            )
-
-            if not tweets:
-                continue
+        with closing(
+            iter_search_results(client, queries, start_time, end_time)
+        ) as search_results:
+            for raw_resp in search_results:
+                # tweepy.Response は data / meta を必ず持つ namedtuple
+                tweets = raw_resp.data or []
+                log_debug(
+                    RETWEET_LOG_FILE,
+                    "[DEBUG] Raw API meta: %s",
+                    raw_resp.meta,
+                )
 
-            for tw in tweets:
-                tid = str(tw.id)
+                log_debug(
+                    RETWEET_LOG_FILE,
+                    "[DEBUG] 取得ツイート件数: %d",
+                    len(tweets),
+                )
 
-                if tid in retweeted_ids:
+                if not tweets:
                     continue
 
-                if total_retweets >= RETWEET_LIMIT:
-                    log_message(
-                        RETWEET_LOG_FILE,
-                        "リツイート上限に達しました。",
+                pending = [
+                    tw for tw in tweets
+                    if tw.id not in retweeted_ids and tw.id not in seen_this_run
+                ]
+
+                # 残り枠の分だけまとめて並列にリツイートし、
+                # 失敗で枠が余った場合は後続の候補で埋める
+                while pending:
+                    if total_retweets >= RETWEET_LIMIT:
+                        log_message(
+                            RETWEET_LOG_FILE,
+                            "リツイート上限に達しました。",
+                        )
+                        compact_retweeted_list()
+                        log_message(
+                            RETWEET_LOG_FILE,
+                            f"=== リツイート終了 [{account_label}]（上限到達） ===",
+                        )
+                        return
+
+                    batch = pending[: RETWEET_LIMIT - total_retweets]
+                    pending = pending[len(batch):]
+                    seen_this_run.update(tw.id for tw in batch)
+
+                    errors = retweet_many(
+                        client,
+                        [tw.id for tw in batch],
+                        max_workers=MAX_RETWEET_WORKERS,
                     )
-                    save_retweeted_list(retweeted_ids)
-                    log_message(
-                        RETWEET_LOG_FILE,
-                        f"=== リツイート終了 [{account_label}]（上限到達） ===",
-                    )
-                    return
-
-                try:
-                    retweet(client, tw.id)
-                    retweeted_ids.add(tid)
-                    total_retweets += 1
 
-                    preview = tw.text.replace("\n", " ")[:50]
-                    log_message(
-                        RETWEET_LOG_FILE,
-                        f"リツイート成功: {tid} / {preview}...",
-                    )
-                except Exception as e:
-                    log_message(
-                        RETWEET_LOG_FILE,
-                        f"[ERROR] リツイート失敗: {tid} / {e}",
-                    )
+                    for tw, error in zip(batch, errors):
+                        tid = tw.id
+
+                        if error is None:
+                            retweeted_ids.add(tid)
+                            append_retweeted_id(tid)
+                            total_retweets += 1
+
+                            preview = tw.text.replace("\n", " ")[:50]
+                            log_message(
+                                RETWEET_LOG_FILE,
+                                f"リツイート成功: {tid} / {preview}...",
+                            )
+                        else:
+                            log_message(
+                                RETWEET_LOG_FILE,
+                                f"[ERROR] リツイート失敗: {tid} / {error}",
+                            )
+                            log_message(
+                                RETWEET_LOG_FILE,
+                                "".join(traceback.format_exception(error)),
+                            )
+
+                # 次のレスポンスを要求すると後続クエリの検索が投入されるため、
+                # 上限に達した時点でここで抜ける（実行中の検索の完了のみ待つ）
+                if total_retweets >= RETWEET_LIMIT:
                     log_message(
                         RETWEET_LOG_FILE,
-                        traceback.format_exc(),
+                        "上限到達のため後続クエリをスキップ",
                     )
+                    break
 
-        save_retweeted_list(retweeted_ids)
+        compact_retweeted_list()
         log_message(
             RETWEET_LOG_FILE,
             f"=== リツイート完了 [{account_label}]（{total_retweets}件） ===",
@@ -277,6 +429,9 @@ def run_retweet_task(suffix: str | None = None) -> None:
         )
         sys.exit(1)
 
+    finally:
+        flush_logs()
+
 
 
 # ------------------------------------------------------------
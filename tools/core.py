@@ -6,10 +6,23 @@ core.py
  - ディレクトリ・ファイルパスの初期化
 """
 
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
 from pathlib import Path
-from datetime import datetime
-from config import DATA_DIR, LOG_DIR
-from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Dict, Set, Tuple
+from config import DATA_DIR, LOG_DIR, ensure_dotenv
+from datetime import date, datetime, timedelta, timezone, time as dt_time
+
+# --- タイムゾーン ---
+JST = timezone(timedelta(hours=9))
+UTC = timezone.utc
+
+# ログのタイムスタンプ書式（ISO 8601 互換・秒までの部分）
+_LOG_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
 
 # --- パス設定 ---
 DATA_PATH = Path(DATA_DIR)
@@ -17,13 +30,98 @@ LOG_PATH = Path(LOG_DIR)
 
 FOLLOWING_FILE = DATA_PATH / "following.json"
 RETWEETED_FILE = DATA_PATH / "retweeted.json"
+RETWEETED_JOURNAL_FILE = DATA_PATH / "retweeted.ndjson"
+QUERY_CACHE_PATH = DATA_PATH / "cache"
 RETWEET_LOG_FILE = LOG_PATH / "retweeting.log"
 
 # --- ディレクトリ初期化 ---
-DATA_PATH.mkdir(parents=True, exist_ok=True)
-LOG_PATH.mkdir(parents=True, exist_ok=True)
+# 作成確認済みのディレクトリ（同じディレクトリへの mkdir を繰り返さない）
+_ENSURED_DIRS: Set[Path] = set()
+
+
+def ensure_directory(path: Path) -> None:
+    """
+    ディレクトリが存在することを保証する。
+    プロセス内で一度確認したディレクトリに対しては mkdir を再実行しない。
+    """
+    if path not in _ENSURED_DIRS:
+        path.mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+
+
+ensure_directory(DATA_PATH)
+ensure_directory(LOG_PATH)
 
 # --- ログユーティリティ ---
+# ログファイルごとに開いたままのハンドル（open/close をログ 1 行ごとに行わない）
+_LOG_HANDLES: Dict[Path, BinaryIO] = {}
+_LOG_BUFFER_SIZE = 64 * 1024
+# この行数を書き込むごとにバッファをフラッシュする（異常終了時の欠落を抑える）
+_LOG_FLUSH_INTERVAL = 64
+_LOG_LOCK = threading.Lock()
+_log_pending_lines = 0
+# 秒単位で変わるタイムスタンプ部分のキャッシュ
+_log_last_sec = -1
+_log_last_prefix = ""
+
+
+def _get_log_handle(log_file: Path) -> BinaryIO:
+    """
+    指定されたログファイルの追記用ハンドル（バイナリモード）を返す。
+    テキストモードの TextIOWrapper を経由せず、UTF-8 へのエンコードは呼び出し側で行う。
+
+    初回のみ親ディレクトリを作成してファイルを開き、
+    以降は同じハンドルを再利用する。
+    """
+    fh = _LOG_HANDLES.get(log_file)
+    if fh is None:
+        ensure_directory(log_file.parent)
+        fh = log_file.open("ab", buffering=_LOG_BUFFER_SIZE)
+        _LOG_HANDLES[log_file] = fh
+    return fh
+
+
+def flush_logs() -> None:
+    """
+    バッファリングされているログをすべてファイルへ書き出す。
+
+    タスク終了時など、ログ内容を確実にディスクへ反映させたい
+    タイミングで呼び出す。プロセス終了時にも自動で呼ばれる。
+    """
+    global _log_pending_lines
+    with _LOG_LOCK:
+        for fh in _LOG_HANDLES.values():
+            fh.flush()
+        _log_pending_lines = 0
+
+
+def _close_logs() -> None:
+    with _LOG_LOCK:
+        for fh in _LOG_HANDLES.values():
+            fh.close()
+        _LOG_HANDLES.clear()
+
+
+atexit.register(_close_logs)
+
+
+def _log_timestamp() -> str:
+    """
+    ログ用のタイムスタンプ（ISO 8601・マイクロ秒精度）を返す。
+
+    strftime による整形は秒が変わったときだけ行い、
+    同一秒内ではキャッシュした文字列にマイクロ秒部分を付け足す。
+    _LOG_LOCK を保持した状態で呼び出すこと。
+    """
+    global _log_last_sec, _log_last_prefix
+    now = time.time()
+    sec = int(now)
+    if sec != _log_last_sec:
+        _log_last_prefix = time.strftime(_LOG_TIME_FORMAT, time.localtime(sec))
+        _log_last_sec = sec
+    return f"{_log_last_prefix}.{int((now - sec) * 1_000_000):06d}"
+
+
 def log_message(log_file: Path, message: str, print_to_console:bool = True) -> None:
     """
     指定されたログファイルへメッセージを追記し、
@@ -31,14 +129,20 @@ def log_message(log_file: Path, message: str, print_to_console:bool = True) -> N
 
     本関数は以下の責務を持つ。
     - ログファイルの親ディレクトリが存在しない場合、自動的に作成する
-    - ISO 8601 形式のタイムスタンプを付与してログを追記する
+    - ISO 8601 形式（マイクロ秒精度）のタイムスタンプを付与してログを追記する
     - 実行時の可視性確保のため、同じメッセージを標準出力にも出す
 
+    ファイルハンドルはログファイルごとに保持され、書き込みはバッファリングされる。
+    ディスクへの反映は `flush_logs()` の呼び出し時、全ログファイル合計で
+    _LOG_FLUSH_INTERVAL 行ごと、
+    バッファが一杯になった時、またはプロセス終了時に行われる。
+    複数スレッドから呼び出しても行が混ざらないよう、書き込みはロックで保護する。
+
     Args:
         log_file (Path):
             出力先となるログファイルのパス。
             親ディレクトリが存在しない場合でも安全に使用できるよう、
-            内部で `mkdir(parents=True, exist_ok=True)` を実行する。
+            初回書き込み時に `ensure_directory()` で作成する。
         message (str):
             ログとして記録したいメッセージ本文。
             改行は内部で付与されるため、通常は末尾の改行を含める必要はない。
@@ -61,55 +165,94 @@ def log_message(log_file: Path, message: str, print_to_console:bool = True) -> N
             本関数では例外を捕捉せず、そのまま呼び出し元へ送出する設計とする。
             （上位レイヤーで一括して異常終了・ログ出力を行うことを想定）
     """
-    log_file.parent.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now().isoformat()
-    line = f"[{timestamp}] {message}\n"
+    global _log_pending_lines
+    with _LOG_LOCK:
+        line = f"[{_log_timestamp()}] {message}\n"
+        fh = _get_log_handle(log_file)
+        fh.write(line.encode("utf-8"))
+        _log_pending_lines += 1
+        if _log_pending_lines >= _LOG_FLUSH_INTERVAL:
+            # 行数は全ログファイル合計で数えるため、全ハンドルをフラッシュする
+            for handle in _LOG_HANDLES.values():
+                handle.flush()
+            _log_pending_lines = 0
 
-    with log_file.open("a", encoding="utf-8") as f:
-        f.write(line)
     if print_to_console:
-        print(message)
+        # print() は本文と改行を別々に書き込むため、1 回の write にまとめる
+        sys.stdout.write(f"{message}\n")
+
+
+@functools.lru_cache(maxsize=1)
+def _debug_enabled() -> bool:
+    """
+    環境変数 DEBUG=1 が設定されているかを返す。
+
+    .env に記述された DEBUG も反映されるよう、import 時ではなく
+    初回呼び出し時に .env を読み込んでから判定し、結果をキャッシュする。
+    """
+    ensure_dotenv()
+    return os.environ.get("DEBUG") == "1"
+
+
+def log_debug(
+    log_file: Path,
+    fmt: str,
+    *args: object,
+    print_to_console: bool = True,
+) -> None:
+    """
+    デバッグ用ログを出力する。
+
+    環境変数 DEBUG=1（.env での指定を含む）が無効な場合は何もしない。
+    メッセージは `fmt % args` 形式で、出力する場合にのみ組み立てるため、
+    無効時は文字列生成・ファイル書き込みのコストが発生しない。
+
+    Args:
+        log_file (Path):
+            出力先となるログファイルのパス。
+        fmt (str):
+            % 形式のフォーマット文字列。
+        *args (object):
+            fmt に埋め込む値。
+        print_to_console (bool):
+            log_message にそのまま渡す。
+    """
+    if _debug_enabled():
+        log_message(log_file, fmt % args if args else fmt, print_to_console)
 
 
 # ------------------------------------------------------------
 # 前日の日付範囲取得
 # ------------------------------------------------------------
+# JST の日付 → (start_utc, end_utc)。日付が変わるまで同じ結果を返す
+_RANGE_CACHE: Dict[date, Tuple[datetime, datetime]] = {}
+
+
 def get_previous_day_range_utc() -> tuple[datetime, datetime]:
     """
     日本時間の「昨日 0:00」〜「本日 0:00」の時刻範囲を、
     そのまま UTC に変換して返す。
     （Twitter API の日時指定に直接使用できる形式）
-    """
 
-    JST = timezone(timedelta(hours=9))
-    
-    # 日本時間の現在日時
-    now_jst = datetime.now(JST)
+    結果は JST の日付ごとにキャッシュされる。
+    """
 
     # 日付部分だけ取得（JST）
-    today_jst_date = now_jst.date()
+    today_jst_date = datetime.now(JST).date()
+    cached = _RANGE_CACHE.get(today_jst_date)
+    if cached is not None:
+        return cached
+
     yesterday_jst_date = today_jst_date - timedelta(days=1)
 
-    # JST の昨日 0:00
-    start_jst = datetime(
-        year=yesterday_jst_date.year,
-        month=yesterday_jst_date.month,
-        day=yesterday_jst_date.day,
-        hour=0, minute=0, second=0,
-        tzinfo=JST
-    )
-
-    # JST の今日 0:00
-    end_jst = datetime(
-        year=today_jst_date.year,
-        month=today_jst_date.month,
-        day=today_jst_date.day,
-        hour=0, minute=0, second=0,
-        tzinfo=JST
-    )
-
-    # UTC に変換
-    start_utc = start_jst.astimezone(timezone.utc)
-    end_utc = end_jst.astimezone(timezone.utc)
-
-    return start_utc, end_utc
\ No newline at end of file
+    # JST の昨日 0:00 / 今日 0:00 を UTC に変換
+    start_utc = datetime.combine(yesterday_jst_date, dt_time.min, tzinfo=JST).astimezone(UTC)
+    end_utc = datetime.combine(today_jst_date, dt_time.min, tzinfo=JST).astimezone(UTC)
+
+    # 日付をまたいで動き続けるプロセスでも肥大化しないよう、直近分のみ保持する
+    if len(_RANGE_CACHE) >= 2:
+        _RANGE_CACHE.clear()
+    result = (start_utc, end_utc)
+    _RANGE_CACHE[today_jst_date] = result
+
+    return result
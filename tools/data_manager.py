@@ -6,16 +6,75 @@ data_manager.py
 責務:
   - フォローリスト（username）の読み込み
   - リツイート済みツイート ID の保存/読み込み（重複回避用）
+  - 生成済み検索クエリのキャッシュ保存/読み込み
+
+リツイート済み ID の永続化:
+  - retweeted.json   : ソート済み ID 一覧（正本）
+  - retweeted.ndjson : 新規 ID を 1 行 1 件で追記するジャーナル
+  新規 ID はジャーナルへの追記のみで記録し、件数が閾値を超えた時点で
+  retweeted.json へ統合（コンパクション）する。
 
 注意:
   - Tweepy や API 呼び出しは含まれません。API 呼び出しは twitter_api.py が担当します。
-  - ファイルパスは `.core` 等で定義されたパス定数（FOLLOWING_FILE, RETWEETED_FILE）を用いる想定です。
+  - ファイルパスは `.core` 等で定義されたパス定数（FOLLOWING_FILE, RETWEETED_FILE, RETWEETED_JOURNAL_FILE）を用いる想定です。
 """
 
-import json
-from typing import List, Set
+import heapq
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import orjson
+
+from config import QUERY_CACHE_MAX_FILES, RETWEETED_COMPACT_THRESHOLD
+from .core import (
+    FOLLOWING_FILE,
+    RETWEETED_FILE,
+    RETWEETED_JOURNAL_FILE,
+    QUERY_CACHE_PATH,
+    ensure_directory,
+)
+
+
+# ----------------------------------------------------------------------
+# JSON 読み込みキャッシュ
+# ----------------------------------------------------------------------
+# パスごとのパース結果: {path: ((st_mtime_ns, st_size), data)}
+_JSON_CACHE: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+
+
+def _load_json_cached(
+    path: Path,
+    convert: Optional[Callable[[Any], Any]] = None,
+) -> Any:
+    """
+    JSON ファイルを読み込んでパース結果を返す。
+
+    ファイルの更新時刻（st_mtime_ns）とサイズが前回読み込み時から
+    変わっていなければ、再パースせずにキャッシュ済みの結果を返す。
+    戻り値はキャッシュと共有されるため、呼び出し側で変更しないこと。
+
+    Args:
+        path (Path):
+            読み込む JSON ファイルのパス。
+        convert (Callable | None):
+            パース結果に適用する変換関数。
+            変換後の値がキャッシュされるため、ヒット時は変換も省略される。
+    """
+    st = path.stat()
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _JSON_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    data = orjson.loads(path.read_bytes())
+    if convert is not None:
+        data = convert(data)
+    _JSON_CACHE[path] = (key, data)
+    return data
 
-from .core import FOLLOWING_FILE, RETWEETED_FILE
+
+def _to_id_frozenset(arr: List[Any]) -> FrozenSet[int]:
+    return frozenset(map(int, arr))
 
 
 # ----------------------------------------------------------------------
@@ -24,44 +83,164 @@ from .core import FOLLOWING_FILE, RETWEETED_FILE
 def load_following_list() -> List[str]:
     """
     保存済みのフォロー一覧（username のリスト）を JSON から読み込んで返す。
+    following.json が前回から更新されていない場合はパース結果を再利用する。
 
     Returns:
         List[str]: username のリスト。
                    ファイルが存在しない場合は空リストを返す。
 
     Raises:
-        OSError / json.JSONDecodeError: ファイル読み込み/パースに失敗した場合。
+        OSError / orjson.JSONDecodeError: ファイル読み込み/パースに失敗した場合。
     """
     if not FOLLOWING_FILE.exists():
         return []
 
-    with FOLLOWING_FILE.open("r", encoding="utf-8") as f:
-        following_list = json.load(f)
-        # print(following_list)
-        print("following_listを読み込みました。")
-        return following_list
+    following_list = list(_load_json_cached(FOLLOWING_FILE))
+    print("following_listを読み込みました。")
+    return following_list
 
 
 # ----------------------------------------------------------------------
 # リツイート済 ID 管理（重複回避）
 # ----------------------------------------------------------------------
-def load_retweeted_list() -> Set[str]:
+def _load_retweeted_journal() -> List[int]:
+    """
+    ジャーナル（retweeted.ndjson）に追記された ID を読み込んで返す。
+    ファイルが存在しない場合は空リストを返す。
+    """
+    if not RETWEETED_JOURNAL_FILE.exists():
+        return []
+
+    return list(map(int, RETWEETED_JOURNAL_FILE.read_bytes().split()))
+
+
+def load_retweeted_list() -> Set[int]:
     """
     保存済みのリツイート済みツイート ID を読み込み、集合として返す。
+    retweeted.json とジャーナル（retweeted.ndjson）の両方を統合する。
     ファイルが存在しない場合は空集合を返す。
+
+    ファイル上の ID は文字列だが、Tweepy の `Tweet.id` と直接比較できるよう
+    int に変換して返す。
+    """
+    if RETWEETED_FILE.exists():
+        # キャッシュは不変の frozenset で保持し、呼び出し側には変更可能な複製を返す
+        retweeted_ids: Set[int] = set(_load_json_cached(RETWEETED_FILE, _to_id_frozenset))
+    else:
+        retweeted_ids = set()
+
+    retweeted_ids.update(_load_retweeted_journal())
+    return retweeted_ids
+
+
+def append_retweeted_id(tweet_id: int) -> None:
+    """
+    新たにリツイートした ID をジャーナル（retweeted.ndjson）へ 1 行追記する。
+
+    retweeted.json 全体を書き直さずに済むため、
+    書き込み量は既存の履歴件数に依存しない。
     """
-    if not RETWEETED_FILE.exists():
-        return set()
+    with RETWEETED_JOURNAL_FILE.open("ab") as f:
+        f.write(b"%d\n" % tweet_id)
 
-    with RETWEETED_FILE.open("r", encoding="utf-8") as f:
-        arr = json.load(f)
 
-    return set(str(x) for x in arr)
+def _write_retweeted_file(sorted_ids: Iterable[int]) -> None:
+    """
+    昇順に並んだ ID を文字列として retweeted.json へ書き出し、
+    統合済みとなったジャーナル（retweeted.ndjson）を削除する。
+    """
+    RETWEETED_FILE.write_bytes(
+        orjson.dumps([str(x) for x in sorted_ids], option=orjson.OPT_INDENT_2)
+    )
+
+    RETWEETED_JOURNAL_FILE.unlink(missing_ok=True)
+
+
+def compact_retweeted_list(threshold: int = RETWEETED_COMPACT_THRESHOLD) -> bool:
+    """
+    ジャーナルの件数が threshold 以上の場合のみ、
+    ジャーナルの ID を retweeted.json へ統合する。
+
+    retweeted.json は昇順で保存されているため、全件を再ソートせず、
+    新規 ID（k 件）のみをソートして既存の並びへ併合する（O(n + k log k)）。
+
+    Args:
+        threshold (int):
+            コンパクションを行うジャーナル件数の閾値。
+
+    Returns:
+        bool:
+            コンパクションを実行した場合は True。
+    """
+    journal_ids = _load_retweeted_journal()
+    if len(journal_ids) < threshold:
+        return False
+
+    if RETWEETED_FILE.exists():
+        base_ids = list(map(int, orjson.loads(RETWEETED_FILE.read_bytes())))
+    else:
+        base_ids = []
+
+    new_ids = sorted(set(journal_ids).difference(base_ids))
+    _write_retweeted_file(heapq.merge(base_ids, new_ids))
+    return True
+
 
+# ----------------------------------------------------------------------
+# 検索クエリキャッシュ
+# ----------------------------------------------------------------------
+def _query_cache_file(cache_key: str) -> Path:
+    return QUERY_CACHE_PATH / f"queries_{cache_key}.json"
+
+
+def load_query_cache(cache_key: str) -> Optional[List[str]]:
+    """
+    cache_key に対応する検索クエリのキャッシュを読み込んで返す。
+    ヒットしたファイルは更新時刻を更新し、古いキャッシュの削除対象から外す。
+
+    Returns:
+        List[str] | None:
+            キャッシュが存在する場合はクエリ文字列のリスト。
+            存在しない場合、またはファイルが壊れている場合は None。
+    """
+    cache_file = _query_cache_file(cache_key)
+    if not cache_file.exists():
+        return None
+
+    try:
+        queries = orjson.loads(cache_file.read_bytes())
+    except orjson.JSONDecodeError:
+        queries = None
+
+    if not isinstance(queries, list):
+        # 書き込み途中で中断された等で壊れたキャッシュはミス扱いとし、再生成させる
+        cache_file.unlink(missing_ok=True)
+        return None
+
+    cache_file.touch()
+    return queries
 
-def save_retweeted_list(retweeted_ids: Set[str]) -> None:
+
+def save_query_cache(cache_key: str, queries: List[str]) -> None:
     """
-    リツイート済みツイート ID の集合を JSON ファイルへ保存する。
+    検索クエリを cache_key に対応するキャッシュファイルへ保存する。
+
+    アカウントごとにキーワードが異なりキーも異なるため、キャッシュは
+    キーごとに 1 ファイルずつ保持する。ファイル数が QUERY_CACHE_MAX_FILES を
+    超えた場合は、更新時刻の古いものから削除する。
     """
-    with RETWEETED_FILE.open("w", encoding="utf-8") as f:
-        json.dump(sorted(list(retweeted_ids)), f, ensure_ascii=False, indent=2)
+    ensure_directory(QUERY_CACHE_PATH)
+    cache_file = _query_cache_file(cache_key)
+    # 一時ファイルへ書き出してから置き換え、中断時に壊れたファイルを残さない
+    tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+    tmp_file.write_bytes(orjson.dumps(queries, option=orjson.OPT_INDENT_2))
+    tmp_file.replace(cache_file)
+
+    cache_files = sorted(
+        QUERY_CACHE_PATH.glob("queries_*.json"),
+        key=lambda p: p.stat().st_mtime_ns,
+        reverse=True,
+    )
+    for old_file in cache_files[QUERY_CACHE_MAX_FILES:]:
+        if old_file != cache_file:
+            old_file.unlink(missing_ok=True)
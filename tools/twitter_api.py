@@ -10,30 +10,57 @@ Twitter (X) API へのアクセス機能をまとめたモジュール。
   - create_client()
   - build_search_query(...)
   - search_tweets(...)
+  - search_tweets_stream(...)
+  - search_tweets_all(...)
+  - search_by_users(...)
   - retweet(...)
+  - retweet_many(...)
   - tweet_rate_limit_exceeded_notice(...)
 
 設計方針:
   - 認証情報は config.load_twitter_auth に集約する
-  - Tweepy Response は動的属性を持つため getattr を用いて安全に扱う
+  - tweepy.Response は data / includes / errors / meta を必ず持つ namedtuple のため、
+    属性として直接参照する（data は結果が 0 件の場合 None になる点に注意する）
 """
 
 from __future__ import annotations
 
-from typing import List, Optional, Sequence, Union, cast
-from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union, cast
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timezone
+import functools
 import logging
+import sys
 
 import tweepy
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from config import load_twitter_auth, TwitterAuth, EXCLUDE_KEYWORDS
 
 logger = logging.getLogger(__name__)
 
+# 一時的なサーバーエラーに対する再試行設定（GET のみ・POST は再送しない）
+# 429 は wait_on_rate_limit により Tweepy 側で待機・再試行されるため含めない
+_HTTP_RETRY = Retry(
+    total=3,
+    backoff_factor=0.2,
+    status_forcelist=(500, 502, 503, 504),
+    raise_on_status=False,
+)
+
+# search_recent_tweets で取得するツイートフィールド。
+# Tweepy は list を毎回 "," で連結するため、連結済みの文字列として保持する
+# （tuple は連結されずにクエリパラメータが重複送信されるため使用しない）
+_TWEET_FIELDS = "id,text,author_id,created_at"
+_BASE_SEARCH_PARAMS: Dict[str, Any] = {"tweet_fields": _TWEET_FIELDS}
+
 
 # --------------------------------------------------------------------------
 # 1) Tweepy クライアント生成
 # --------------------------------------------------------------------------
+@functools.lru_cache(maxsize=4)
 def create_client(suffix: str | None = None) -> tweepy.Client:
     """
     config.load_twitter_auth を用いて Twitter API 認証情報を取得し、
@@ -42,6 +69,11 @@ def create_client(suffix: str | None = None) -> tweepy.Client:
     認証情報の妥当性チェックは load_twitter_auth 側で完結しているため、
     本関数では Client 初期化のみを責務とする。
 
+    Client は suffix ごとにキャッシュされ、内部の requests.Session
+    （およびその接続プール）を呼び出し間で再利用する。
+    HTTPS 接続には並列リクエスト数に見合ったプールサイズと、
+    5xx 応答に対する再試行を設定する。
+
     Args:
         suffix (str | None):
             使用する Twitter アカウント識別子。
@@ -60,7 +92,7 @@ def create_client(suffix: str | None = None) -> tweepy.Client:
     auth: TwitterAuth = load_twitter_auth(suffix)
 
     try:
-        return tweepy.Client(
+        client = tweepy.Client(
             bearer_token=auth.bearer_token,
             consumer_key=auth.api_key,
             consumer_secret=auth.api_secret,
@@ -72,6 +104,12 @@ def create_client(suffix: str | None = None) -> tweepy.Client:
         logger.error("Tweepy.Client の初期化に失敗しました: %s", e)
         raise
 
+    client.session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_HTTP_RETRY),
+    )
+    return client
+
 
 # --------------------------------------------------------------------------
 # 2) 検索クエリ生成
@@ -81,11 +119,12 @@ def build_search_query(
     keywords: Sequence[str],
     exclude_retweets: bool = True,
     exclude_replies: bool = True,
-    start_date: str | None = None,
-    end_date: str | None = None,
+    start_date: str | datetime | None = None,
+    end_date: str | datetime | None = None,
 ) -> str:
     """
     Twitter 検索 API（v2）用の検索クエリ文字列を組み立てる。
+    同一条件での呼び出し結果は `functools.lru_cache` によりキャッシュされる。
     
     Args:
         usernames (Sequence[str]):
@@ -98,49 +137,96 @@ def build_search_query(
             True の場合、リツイート（-is:retweet）を除外する。
         exclude_replies (bool):
             True の場合、リプライ（-is:reply）を除外する。
-        start_date (str | None):
+        start_date (str | datetime | None):
             検索開始日（YYYY-MM-DD）。
-        end_date (str | None):
+            datetime を渡した場合は UTC の `YYYY-MM-DD_HH:MM:SS_UTC` 形式に変換する。
+        end_date (str | datetime | None):
             検索終了日（YYYY-MM-DD）。
+            datetime の扱いは start_date と同じ。
 
     Returns:
         str:
             Twitter API に渡す検索クエリ文字列。
             条件が一切指定されない場合は空文字列を返す。
     """
-    parts: list[str] = []
+    return _build_search_query(
+        tuple(usernames),
+        tuple(keywords),
+        exclude_retweets,
+        exclude_replies,
+        _format_query_date(start_date),
+        _format_query_date(end_date),
+    )
+
 
-    # --- ユーザー条件 ---
-    if usernames:
-        user_parts = [f"from:{u}" for u in usernames]
-        parts.append("(" + " OR ".join(user_parts) + ")")
-        
-    # --- 必須条件: YouTube リンク ---
-    parts.append("""(youtu OR youtube OR "youtu.be" OR "YouTube")""")
+@functools.lru_cache(maxsize=8)
+def _format_query_date(value: str | datetime | None) -> str | None:
+    """
+    since: / until: 条件に埋め込む日時文字列を返す。
+    文字列と None はそのまま返し、datetime は UTC に変換して整形する。
+    タイムゾーン情報を持たない datetime は UTC とみなす。
+    """
+    if not isinstance(value, datetime):
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d_%H:%M:%S_UTC")
 
-    # --- キーワード条件 ---
-    if keywords:
-        keyword_parts = [str(k) for k in keywords]
-        parts.append("(" + " OR ".join(keyword_parts) + ")")
 
-    # --- 除外条件 ---
-    if exclude_retweets:
-        parts.append("-is:retweet")
-    if exclude_replies:
-        parts.append("-is:reply")
-    if EXCLUDE_KEYWORDS:
-        exclude_parts = [f'-{keyword}' for keyword in EXCLUDE_KEYWORDS]
-        parts.append(" ".join(exclude_parts))
+# username → "from:username"（intern 済み）。同じフォローリストでの再構築時に再生成しない
+_FROM_CACHE: Dict[str, str] = {}
 
 
-    # --- 日付条件 ---
-    if start_date:
-        parts.append(f"since:{start_date}")
-    if end_date:
-        parts.append(f"until:{end_date}")
+def _from_clause(username: str) -> str:
+    clause = _FROM_CACHE.get(username)
+    if clause is None:
+        clause = sys.intern(f"from:{username}")
+        _FROM_CACHE[username] = clause
+    return clause
 
-    return " ".join(parts)
 
+# 検索クエリの出力形式のバージョン。
+# 下記の条件文字列や _build_search_query の組み立て順を変更した場合はインクリメントし、
+# 保存済みの検索クエリキャッシュ（retweeting_bot.create_search_queries）を無効化すること
+QUERY_FORMAT_VERSION = 1
+
+# 必須条件: YouTube リンク
+_YOUTUBE_CLAUSE = """(youtu OR youtube OR "youtu.be" OR "YouTube")"""
+# 除外キーワード条件（config から一度だけ組み立てる）
+_EXCLUDE_CLAUSE = " ".join(f"-{keyword}" for keyword in EXCLUDE_KEYWORDS)
+
+
+@functools.lru_cache(maxsize=128)
+def _build_search_query(
+    usernames: Tuple[str, ...],
+    keywords: Tuple[str, ...],
+    exclude_retweets: bool,
+    exclude_replies: bool,
+    start_date: str | None,
+    end_date: str | None,
+) -> str:
+    """
+    build_search_query の実体。
+    引数をタプル化して受け取り、同一条件のクエリは lru_cache から返す。
+    """
+    user_clause = "(" + " OR ".join([_from_clause(u) for u in usernames]) + ")" if usernames else ""
+    keyword_clause = "(" + " OR ".join(map(str, keywords)) + ")" if keywords else ""
+
+    return " ".join(
+        filter(
+            None,
+            (
+                user_clause,
+                _YOUTUBE_CLAUSE,
+                keyword_clause,
+                "-is:retweet" if exclude_retweets else "",
+                "-is:reply" if exclude_replies else "",
+                _EXCLUDE_CLAUSE,
+                f"since:{start_date}" if start_date else "",
+                f"until:{end_date}" if end_date else "",
+            ),
+        )
+    )
 
 
 # --------------------------------------------------------------------------
@@ -176,6 +262,114 @@ def search_tweets(
             return_raw=False の場合は Tweet のリスト。
             True の場合は API 生レスポンス。
 
+    Raises:
+        ValueError:
+            query が空の場合。
+        tweepy.TweepyException:
+            API 呼び出しに失敗した場合。
+    """
+    with closing(
+        search_tweets_stream(client, query, start_time, end_time, max_results)
+    ) as pages:
+        resp = next(pages)
+
+    if return_raw:
+        return cast(tweepy.Response, resp)
+
+    return resp.data or []
+
+
+def search_tweets_stream(
+    client: tweepy.Client,
+    query: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    max_results: int = 50,
+) -> Iterator[tweepy.Response]:
+    """
+    search_recent_tweets をページ単位で実行し、各ページのレスポンスを順に返す。
+
+    リクエストパラメータの dict は最初に一度だけ組み立て、
+    2 ページ目以降は next_token のみを書き換えて再利用する。
+    meta に next_token が含まれなくなった時点で終了する。
+
+    Args:
+        client (tweepy.Client):
+            認証済みクライアント。
+        query (str):
+            検索クエリ文字列。
+        start_time (datetime | None):
+            検索開始時刻（UTC）。
+        end_time (datetime | None):
+            検索終了時刻（UTC）。
+        max_results (int):
+            1 ページあたりの取得件数（最大 100）。
+
+    Yields:
+        tweepy.Response:
+            各ページの API 生レスポンス。
+
+    Raises:
+        ValueError:
+            query が空の場合。
+        tweepy.TweepyException:
+            API 呼び出しに失敗した場合。
+    """
+    if not query:
+        raise ValueError("検索クエリが空です。")
+
+    params = {**_BASE_SEARCH_PARAMS, "query": query, "max_results": max_results}
+    if start_time:
+        params["start_time"] = start_time
+    if end_time:
+        params["end_time"] = end_time
+
+    while True:
+        try:
+            resp = client.search_recent_tweets(**params)
+        except tweepy.TweepyException as e:
+            logger.error("search_recent_tweets に失敗しました: %s", e)
+            raise
+
+        yield cast(tweepy.Response, resp)
+
+        next_token = (resp.meta or {}).get("next_token")
+        if not next_token:
+            return
+        params["next_token"] = next_token
+
+
+def search_tweets_all(
+    client: tweepy.Client,
+    query: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    total: int = 500,
+) -> List[tweepy.Tweet]:
+    """
+    tweepy.Paginator を用いて search_recent_tweets を複数ページ取得し、
+    最大 total 件の Tweet をまとめて返す。
+
+    1 ページあたり最大件数（100 件）で取得するため、
+    search_tweets を繰り返し呼ぶ場合よりも API 呼び出し回数が少ない。
+    ただし取得件数に応じて読み取り課金が発生するため、total は必要最小限とすること。
+
+    Args:
+        client (tweepy.Client):
+            認証済みクライアント。
+        query (str):
+            検索クエリ文字列。
+        start_time (datetime | None):
+            検索開始時刻（UTC）。
+        end_time (datetime | None):
+            検索終了時刻（UTC）。
+        total (int):
+            取得する Tweet の最大件数。
+
+    Returns:
+        List[tweepy.Tweet]:
+            取得した Tweet のリスト。
+
     Raises:
         ValueError:
             query が空の場合。
@@ -185,26 +379,93 @@ def search_tweets(
     if not query:
         raise ValueError("検索クエリが空です。")
 
-    params = {
-        "query": query,
-        "max_results": max_results,
-        "tweet_fields": ["id", "text", "author_id", "created_at"],
-    }
+    params = {**_BASE_SEARCH_PARAMS, "query": query, "max_results": 100}
     if start_time:
         params["start_time"] = start_time
     if end_time:
         params["end_time"] = end_time
 
     try:
-        resp = client.search_recent_tweets(**params)
+        paginator = tweepy.Paginator(client.search_recent_tweets, **params)
+        return list(paginator.flatten(limit=total))
     except tweepy.TweepyException as e:
-        logger.error("search_recent_tweets に失敗しました: %s", e)
+        logger.error("search_recent_tweets（ページング）に失敗しました: %s", e)
         raise
 
-    if return_raw:
-        return cast(tweepy.Response, resp)
 
-    return getattr(resp, "data", None) or []
+def search_by_users(
+    client: tweepy.Client,
+    usernames: Sequence[str],
+    keywords: Sequence[str],
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    max_results: int = 50,
+    chunk_size: int = 8,
+    max_workers: int = 4,
+) -> List[tweepy.Tweet]:
+    """
+    usernames を chunk_size 人ずつのグループに分割してグループごとに検索クエリを組み立て、
+    スレッドプールで並列に検索した結果を tweet.id で重複排除して返す。
+
+    1 クエリに大量の `from:` 条件を並べると検索クエリの長さ上限に達するため、
+    小さなクエリに分割したうえで HTTP 往復の待ち時間を重ねる。
+    wait_on_rate_limit はスレッドごとに Tweepy 側で適用される。
+
+    Args:
+        client (tweepy.Client):
+            認証済みクライアント。スレッド間で共有する。
+        usernames (Sequence[str]):
+            '@' を含まない Twitter username のリスト。
+        keywords (Sequence[str]):
+            検索キーワードのリスト。
+        start_time (datetime | None):
+            検索開始時刻（UTC）。
+        end_time (datetime | None):
+            検索終了時刻（UTC）。
+        max_results (int):
+            クエリ 1 件あたりの取得件数（最大 100）。
+        chunk_size (int):
+            1 クエリに含める username の数。
+        max_workers (int):
+            同時に実行する検索の最大数。
+
+    Returns:
+        List[tweepy.Tweet]:
+            重複を除いた Tweet のリスト（クエリ順・取得順）。
+
+    Raises:
+        tweepy.TweepyException:
+            いずれかの検索に失敗した場合。
+    """
+    queries = [
+        build_search_query(usernames=usernames[i : i + chunk_size], keywords=keywords)
+        for i in range(0, len(usernames), chunk_size)
+    ]
+    if not queries:
+        return []
+
+    def run(query: str) -> List[tweepy.Tweet]:
+        return cast(
+            List[tweepy.Tweet],
+            search_tweets(
+                client,
+                query,
+                start_time=start_time,
+                end_time=end_time,
+                max_results=max_results,
+            ),
+        )
+
+    seen_ids: Set[int] = set()
+    tweets: List[tweepy.Tweet] = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as executor:
+        for results in executor.map(run, queries):
+            for tweet in results:
+                if tweet.id not in seen_ids:
+                    seen_ids.add(tweet.id)
+                    tweets.append(tweet)
+
+    return tweets
 
 
 # --------------------------------------------------------------------------
@@ -237,6 +498,40 @@ def retweet(client: tweepy.Client, tweet_id: Union[str, int]) -> Optional[dict]:
         raise
 
 
+def retweet_many(
+    client: tweepy.Client,
+    tweet_ids: Sequence[Union[str, int]],
+    max_workers: int = 4,
+) -> List[Optional[Exception]]:
+    """
+    複数のツイート ID をスレッドプールで並列にリツイートする。
+
+    リツイートは 1 件ごとに HTTP 往復を待つ I/O バウンド処理のため、
+    最大 max_workers 件を同時に送信して待ち時間を重ねる。
+    1 件の失敗で他のリツイートが中断されることはない。
+
+    Args:
+        client (tweepy.Client):
+            認証済みクライアント。スレッド間で共有する。
+        tweet_ids (Sequence[str | int]):
+            リツイート対象のツイート ID。
+        max_workers (int):
+            同時に送信するリツイートの最大数。
+
+    Returns:
+        List[Exception | None]:
+            tweet_ids と同じ順序の結果リスト。
+            成功した要素は None、失敗した要素は送出された例外。
+    """
+    if not tweet_ids:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tweet_ids))) as executor:
+        futures = [executor.submit(retweet, client, tweet_id) for tweet_id in tweet_ids]
+
+    return [cast(Optional[Exception], future.exception()) for future in futures]
+
+
 # --------------------------------------------------------------------------
 # 5) レート制限超過時の通知ツイート
 # --------------------------------------------------------------------------